@@ -8,10 +8,12 @@ easy deployment across environments.
 """
 
 import os
-from flask import Flask
+from functools import lru_cache
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, ProgrammingError
 
 # Instantiate the database extension outside of create_app so models can import
 # it without causing circular imports.
@@ -22,13 +24,88 @@ db = SQLAlchemy()
 login_manager = LoginManager()
 login_manager.login_view = 'main.login'
 
+# The project's .env file, resolved from the package location so it is found
+# regardless of the process's working directory.
+_DOTENV_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'
+)
+
+
+@lru_cache(maxsize=1)
+def _read_dotenv(path: str) -> dict:
+    """Parse a .env file once per process.
+
+    Repeated `create_app` calls reuse the parsed values. Since they are only
+    applied to variables that are not already set, editing the file requires
+    a restart to take effect, as with load_dotenv.
+    """
+    from dotenv import dotenv_values
+    return dotenv_values(path)
+
+
+def _code_version() -> str:
+    """Return the newest mtime of the app's source files and templates."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    newest = 0.0
+    for dirpath, _, filenames in os.walk(package_dir):
+        for filename in filenames:
+            if filename.endswith(('.py', '.html')):
+                newest = max(newest, os.path.getmtime(os.path.join(dirpath, filename)))
+    return str(int(newest))
+
+
+def _log_lazy_load(orm_execute_state) -> None:
+    """Warn when a relationship is lazy loaded, a likely N+1 query."""
+    if current_app.debug and orm_execute_state.lazy_loaded_from is not None:
+        current_app.logger.warning(
+            'Lazy load of %s from %r; consider joinedload/selectinload',
+            orm_execute_state.loader_strategy_path,
+            orm_execute_state.lazy_loaded_from.object,
+        )
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for concurrent reads and cheap commits."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during writes and, with synchronous=NORMAL,
+    # avoids an fsync on every commit.
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+
+def _add_column(table: str, column: str, ddl_type: str, backfill: str) -> None:
+    """Add a missing column to an existing table and backfill it.
+
+    Several workers can start against the same old database at once and all
+    see the column as missing. The loser's ALTER fails with a duplicate-column
+    error, which is fine as long as the column now exists; the winner ran the
+    backfill in the same transaction.
+    """
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(db.text(
+                f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}'
+            ))
+            conn.execute(db.text(backfill))
+    except (OperationalError, ProgrammingError):
+        columns = {c['name'] for c in db.inspect(db.engine).get_columns(table)}
+        if column not in columns:
+            raise
+
 
 def create_app() -> Flask:
     """Application factory to create and configure the Flask app instance."""
     # Load environment variables from a .env file if present. This allows
     # developers to set SECRET_KEY and DATABASE_URL locally without exposing
-    # them in version control.
-    load_dotenv()
+    # them in version control. As with load_dotenv, existing environment
+    # variables take precedence over values from the file.
+    if os.path.exists(_DOTENV_PATH):
+        for key, value in _read_dotenv(_DOTENV_PATH).items():
+            if value is not None:
+                os.environ.setdefault(key, value)
 
     app = Flask(__name__)
 
@@ -41,10 +118,45 @@ def create_app() -> Flask:
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Keep a warm pool of connections to server databases, checking them
+    # before use and recycling them before servers drop idle connections.
+    # SQLite keeps SQLAlchemy's default per-thread file connections.
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_pre_ping': True,
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_recycle': 1800,
+        }
+
+    # Password hashing cost. Production keeps Werkzeug's strong scrypt
+    # default; development and test setups can opt into a cheaper method
+    # (e.g. pbkdf2:sha256:1000) so logins and test runs stay fast.
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get(
+        'PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'
+    )
+    app.config['PASSWORD_HASH_SALT_LENGTH'] = int(
+        os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16)
+    )
+
+    # Version of the deployed code, used to invalidate cached pages (ETags)
+    # after a deploy. Defaults to the newest modification time of the
+    # package's modules and templates.
+    app.config['APP_VERSION'] = os.environ.get('APP_VERSION') or _code_version()
+
     # Initialize extensions with the app instance.
     db.init_app(app)
     login_manager.init_app(app)
 
+    # In debug mode, log every lazy relationship load so N+1 query patterns
+    # show up during development. (nplusone would do this, but it does not
+    # support SQLAlchemy 2.x.) The session is shared by every app, so only
+    # register the listener once; it checks the current app's debug flag.
+    if app.debug and not event.contains(
+        db.session, 'do_orm_execute', _log_lazy_load
+    ):
+        event.listen(db.session, 'do_orm_execute', _log_lazy_load)
+
     # Import and register the main blueprint containing routes and views.
     from .routes import bp as main_bp  # type: ignore
     app.register_blueprint(main_bp)
@@ -53,6 +165,45 @@ def create_app() -> Flask:
     # migrations (Flask-Migrate/Alembic), but for a simple journal we can
     # automatically create the schema on launch.
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
         db.create_all()
+        # create_all() only creates missing tables, so databases created
+        # before the dashboard index existed need it added explicitly.
+        if db.engine.dialect.name in ('sqlite', 'postgresql'):
+            with db.engine.begin() as conn:
+                conn.execute(db.text(
+                    'CREATE INDEX IF NOT EXISTS ix_trade_user_ts '
+                    'ON trade (user_id, timestamp DESC)'
+                ))
+        # Likewise add and backfill columns on databases created before they
+        # were introduced.
+        trade_columns = {
+            column['name'] for column in db.inspect(db.engine).get_columns('trade')
+        }
+        if 'direction_sign' not in trade_columns:
+            _add_column(
+                'trade', 'direction_sign', 'SMALLINT',
+                "UPDATE trade SET direction_sign = CASE WHEN "
+                "lower(direction) = 'long' THEN 1 ELSE -1 END",
+            )
+        if 'updated_at' not in trade_columns:
+            _add_column(
+                'trade', 'updated_at', 'TIMESTAMP',
+                'UPDATE trade SET updated_at = timestamp',
+            )
+        # scrypt hashes are longer than the original 128-character column.
+        # SQLite ignores VARCHAR lengths, but PostgreSQL enforces them.
+        if db.engine.dialect.name == 'postgresql':
+            password_column = next(
+                column for column in db.inspect(db.engine).get_columns('user')
+                if column['name'] == 'password_hash'
+            )
+            if password_column['type'].length < 256:
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(
+                        'ALTER TABLE "user" ALTER COLUMN password_hash '
+                        'TYPE VARCHAR(256)'
+                    ))
 
     return app
@@ -8,15 +8,23 @@ rule adherence.
 
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, FloatField, TextAreaField, SelectField, IntegerField, SubmitField
-from wtforms.validators import DataRequired, EqualTo, NumberRange
+from wtforms.validators import DataRequired, EqualTo, InputRequired, NumberRange, ValidationError
+
+# Direction options offered by TradeForm.
+DIRECTION_CHOICES = (("long", "Long"), ("short", "Short"))
+
+# Text fields use DataRequired so whitespace-only input is rejected; password,
+# select and numeric fields only need the value to be present (InputRequired).
+# Entry price and quantity must additionally be positive; a planned risk of 0
+# is allowed and simply yields no R-multiple.
 
 
 class RegistrationForm(FlaskForm):
     """Form for registering a new user."""
     username = StringField("Username", validators=[DataRequired()])
-    password = PasswordField("Password", validators=[DataRequired()])
+    password = PasswordField("Password", validators=[InputRequired()])
     confirm_password = PasswordField(
-        "Confirm Password", validators=[DataRequired(), EqualTo("password", message="Passwords must match")]
+        "Confirm Password", validators=[InputRequired(), EqualTo("password", message="Passwords must match")]
     )
     submit = SubmitField("Register")
 
@@ -24,7 +32,7 @@ class RegistrationForm(FlaskForm):
 class LoginForm(FlaskForm):
     """Form for logging in an existing user."""
     username = StringField("Username", validators=[DataRequired()])
-    password = PasswordField("Password", validators=[DataRequired()])
+    password = PasswordField("Password", validators=[InputRequired()])
     submit = SubmitField("Login")
 
 
@@ -34,19 +42,29 @@ class TradeForm(FlaskForm):
     market = StringField("Market", validators=[DataRequired()])
     direction = SelectField(
         "Direction",
-        choices=[("long", "Long"), ("short", "Short")],
-        validators=[DataRequired()],
+        choices=DIRECTION_CHOICES,
+        validators=[InputRequired()],
     )
-    entry_price = FloatField("Entry Price", validators=[DataRequired()])
+    entry_price = FloatField("Entry Price", validators=[InputRequired()])
     exit_price = FloatField("Exit Price")
-    quantity = FloatField("Quantity", validators=[DataRequired()])
+    quantity = FloatField("Quantity", validators=[InputRequired()])
     stop_loss = FloatField("Stop Loss")
     take_profit = FloatField("Take Profit")
     fees = FloatField("Fees")
-    risk = FloatField("Planned Risk", validators=[DataRequired()])
+    risk = FloatField("Planned Risk", validators=[InputRequired()])
     notes = TextAreaField("Notes")
     emotions = TextAreaField("Emotions")
     rule_adherence = IntegerField(
         "Rule Adherence (1-5)", validators=[NumberRange(min=1, max=5)], default=5
     )
     submit = SubmitField("Save Trade")
+
+    def validate_entry_price(self, field):
+        """Reject zero or negative entry prices."""
+        if field.data is not None and field.data <= 0:
+            raise ValidationError("Entry price must be greater than 0")
+
+    def validate_quantity(self, field):
+        """Reject zero or negative quantities."""
+        if field.data is not None and field.data <= 0:
+            raise ValidationError("Quantity must be greater than 0")
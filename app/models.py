@@ -8,32 +8,71 @@ and risk multiples.
 """
 
 from datetime import datetime
+from functools import lru_cache
+from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import insert
+from sqlalchemy.orm import validates
 from . import db, login_manager
 
 
+class _PasswordMismatch(Exception):
+    """Raised by `_verified_password` so lru_cache does not store failures."""
+
+
+@lru_cache(maxsize=1024)
+def _verified_password(pwhash: str, password: str) -> bool:
+    """Memoise successful password checks so repeated logins skip the KDF.
+
+    Only successful verifications are cached: a mismatch raises, and lru_cache
+    never stores exceptions, so failed attempts are not retained. The cache is
+    process-local and keeps recently verified plaintexts in memory alongside
+    their hashes.
+    """
+    if not check_password_hash(pwhash, password):
+        raise _PasswordMismatch
+    return True
+
+
+def _check_password_hash(pwhash: str, password: str) -> bool:
+    """Check a password, consulting the cache of successful verifications."""
+    try:
+        return _verified_password(pwhash, password)
+    except _PasswordMismatch:
+        return False
+
+
 class User(UserMixin, db.Model):
     """Model representing a registered user of the journal."""
 
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(64), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    username = db.Column(db.String(64), unique=True, index=True, nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+    # Lazy by default; queries that read trade.user should opt in with
+    # .options(joinedload(Trade.user)) rather than join on every Trade load.
     trades = db.relationship('Trade', backref='user', lazy=True)
 
     def set_password(self, password: str) -> None:
         """Hashes and stores a plaintext password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password,
+            method=current_app.config['PASSWORD_HASH_METHOD'],
+            salt_length=current_app.config['PASSWORD_HASH_SALT_LENGTH'],
+        )
+        # Entries are keyed by hash so stale ones can never match again, but
+        # drop them anyway rather than keep old plaintexts around.
+        _verified_password.cache_clear()
 
     def check_password(self, password: str) -> bool:
         """Check a plaintext password against the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return _check_password_hash(self.password_hash, password)
 
 
 @login_manager.user_loader
 def load_user(user_id: str):
     """Flask-Login user loader callback."""
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 
 class Trade(db.Model):
@@ -42,9 +81,11 @@ class Trade(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     symbol = db.Column(db.String(32), nullable=False)
     market = db.Column(db.String(64), nullable=True)
     direction = db.Column(db.String(8), nullable=False)  # Long or Short
+    direction_sign = db.Column(db.SmallInteger, nullable=False)  # 1 long, -1 short
     entry_price = db.Column(db.Float, nullable=False)
     exit_price = db.Column(db.Float, nullable=True)
     quantity = db.Column(db.Float, nullable=False)
@@ -56,20 +97,49 @@ class Trade(db.Model):
     emotions = db.Column(db.Text, nullable=True)
     rule_adherence = db.Column(db.Integer, nullable=True)  # 1–5 scale
 
+    # Serves the dashboard's per-user, newest-first listing from the index.
+    __table_args__ = (
+        db.Index('ix_trade_user_ts', user_id, timestamp.desc()),
+    )
+
+    @staticmethod
+    def sign_for(direction: str) -> int:
+        """Return 1 for a long trade and -1 for a short one."""
+        return 1 if direction.lower() == 'long' else -1
+
+    @validates('direction')
+    def _sync_direction_sign(self, key: str, direction: str) -> str:
+        """Keep `direction_sign` in step whenever the direction is set."""
+        self.direction_sign = self.sign_for(direction)
+        return direction
+
+    @classmethod
+    def bulk_insert(cls, rows: list[dict]) -> None:
+        """Insert many trades with a single multi-row INSERT.
+
+        Each row is a dict of column values. This bypasses per-object ORM
+        bookkeeping, so it suits imports; the caller is responsible for
+        committing the session.
+        """
+        if rows:
+            # Core inserts skip ORM validators, so derive the sign here.
+            rows = [
+                {'direction_sign': cls.sign_for(row['direction']), **row}
+                for row in rows
+            ]
+            db.session.execute(insert(cls), rows)
+
     def pl(self) -> float | None:
         """Calculate the profit or loss for the trade (fees deducted)."""
         if self.exit_price is None:
             return None
-        # Determine profit based on trade direction.
-        price_diff = (
+        # The direction sign flips the price difference for short trades.
+        return (
             (self.exit_price - self.entry_price)
-            if self.direction.lower() == 'long'
-            else (self.entry_price - self.exit_price)
+            * self.direction_sign
+            * self.quantity
+            - (self.fees or 0)
         )
-        pnl = price_diff * self.quantity
-        if self.fees:
-            pnl -= self.fees
-        return pnl
 
     def r_multiple(self) -> float | None:
         """Calculate the trade's R-multiple based on the planned risk."""
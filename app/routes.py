@@ -1,32 +1,59 @@
 """Routes for the trading journal application."""
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import csv
+import io
+
+from flask import (
+    Blueprint, Response, current_app, render_template, redirect, url_for, flash,
+    request, session, stream_with_context, make_response,
+)
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
 
 from . import db
 from .models import User, Trade
-from .forms import RegistrationForm, LoginForm, TradeForm
+
+# Forms are imported inside the views that use them so WTForms is only loaded
+# once a form page is actually requested, not at app start-up.
 
 # Blueprint for route definitions
 main = Blueprint("main", __name__)
 
+# Number of trades shown per dashboard page
+TRADES_PER_PAGE = 50
+
+# Number of rows fetched from the database per batch when exporting
+EXPORT_BATCH_SIZE = 500
+
+# SQL equivalent of ``Trade.pl()`` so dashboard metrics can be aggregated by
+# the database rather than by looping over every trade in Python.
+pl_expr = (
+    (Trade.exit_price - Trade.entry_price) * Trade.direction_sign * Trade.quantity
+    - func.coalesce(Trade.fees, 0)
+)
+
 
 @main.route("/register", methods=["GET", "POST"])
 def register():
     """Handle user registration."""
     if current_user.is_authenticated:
         return redirect(url_for("main.index"))
+    from .forms import RegistrationForm
+
     form = RegistrationForm()
     if form.validate_on_submit():
-        # Check if username already exists
-        if User.query.filter_by(username=form.username.data).first():
-            flash("Username already exists", "danger")
-            return redirect(url_for("main.register"))
-        # Create the user and hash the password
+        # Create the user and hash the password. The unique index on
+        # username rejects duplicates, so no existence check is needed.
         user = User(username=form.username.data)
         user.set_password(form.password.data)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Username already exists", "danger")
+            return redirect(url_for("main.register"))
         flash("Registration successful. Please log in.", "success")
         return redirect(url_for("main.login"))
     return render_template("register.html", form=form)
@@ -37,6 +64,8 @@ def login():
     """Handle user login."""
     if current_user.is_authenticated:
         return redirect(url_for("main.index"))
+    from .forms import LoginForm
+
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
@@ -58,25 +87,127 @@ def logout():
     return redirect(url_for("main.login"))
 
 
+def _with_etag(response, etag: str):
+    """Tag a per-user page, keeping it out of shared caches.
+
+    Used for both the full response and the 304, which must carry the same
+    Cache-Control headers.
+    """
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @main.route("/")
 @login_required
 def index():
     """Display the dashboard with a summary of trades."""
-    trades = (
-        Trade.query.filter_by(user_id=current_user.id)
-        .order_by(Trade.timestamp.desc())
-        .all()
+    page = request.args.get("page", 1, type=int)
+    # The dashboard only changes when the user's trades do, so tag it with the
+    # trade count and latest change time and answer 304 when the browser's
+    # copy is current. Pending flash messages must be rendered, so those
+    # responses are never treated as cached.
+    etag = None
+    if not session.get("_flashes"):
+        trade_count, last_change = db.session.execute(
+            select(func.count(), func.max(Trade.updated_at))
+            .where(Trade.user_id == current_user.id)
+        ).one()
+        etag = "{}-{}-{}-{}-{}".format(
+            current_app.config["APP_VERSION"],
+            current_user.id,
+            page,
+            trade_count,
+            last_change.isoformat() if last_change else 0,
+        )
+        if request.if_none_match.contains_weak(etag):
+            return _with_etag(make_response("", 304), etag)
+    pagination = db.paginate(
+        select(Trade)
+        .where(Trade.user_id == current_user.id)
+        .order_by(Trade.timestamp.desc()),
+        page=page,
+        per_page=TRADES_PER_PAGE,
+    )
+    # Calculate metrics in a single aggregate query over closed trades
+    net_pl, win_count, loss_count = (
+        db.session.query(
+            func.coalesce(func.sum(pl_expr), 0),
+            func.coalesce(func.sum(case((pl_expr > 0, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((pl_expr < 0, 1), else_=0)), 0),
+        )
+        .filter(Trade.user_id == current_user.id, Trade.exit_price.isnot(None))
+        .one()
     )
-    # Calculate metrics
-    net_pl = sum((t.pl() or 0) for t in trades)
-    win_count = len([t for t in trades if (t.pl() or 0) > 0])
-    loss_count = len([t for t in trades if (t.pl() or 0) < 0])
-    return render_template(
+    # Work out P/L and R once per row so the template only formats values
+    rows = []
+    for trade in pagination.items:
+        pl = trade.pl()
+        r = pl / trade.risk if pl is not None and trade.risk else None
+        rows.append({"trade": trade, "pl": pl, "r": r})
+    response = make_response(render_template(
         "dashboard.html",
-        trades=trades,
+        rows=rows,
+        pagination=pagination,
         net_pl=net_pl,
         win_count=win_count,
         loss_count=loss_count,
+    ))
+    if etag:
+        _with_etag(response, etag)
+    return response
+
+
+@main.route("/trades/export.csv")
+@login_required
+def export_trades():
+    """Download all of the user's trades as CSV, including P/L and R."""
+    # P/L and R are computed by the database in the same SELECT, so the export
+    # never instantiates Trade objects or calls pl()/r_multiple() per row.
+    stmt = (
+        select(
+            Trade.timestamp,
+            Trade.symbol,
+            Trade.market,
+            Trade.direction,
+            Trade.entry_price,
+            Trade.exit_price,
+            Trade.quantity,
+            Trade.fees,
+            Trade.risk,
+            pl_expr,
+            case((Trade.risk != 0, pl_expr / Trade.risk)),
+            Trade.rule_adherence,
+            Trade.notes,
+            Trade.emotions,
+        )
+        .where(Trade.user_id == current_user.id)
+        .order_by(Trade.timestamp.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate():
+        # Stream the CSV in batches so memory stays bounded however many
+        # trades the user has, and the download starts immediately.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([
+            "date", "symbol", "market", "direction", "entry_price", "exit_price",
+            "quantity", "fees", "risk", "pl", "r_multiple", "rule_adherence",
+            "notes", "emotions",
+        ])
+        for batch in db.session.execute(stmt).partitions():
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=trades.csv"},
     )
 
 
@@ -84,6 +215,8 @@ def index():
 @login_required
 def new_trade():
     """Create a new trade entry."""
+    from .forms import TradeForm
+
     form = TradeForm()
     if form.validate_on_submit():
         trade = Trade(
@@ -113,10 +246,12 @@ def new_trade():
 @login_required
 def edit_trade(trade_id: int):
     """Edit an existing trade."""
-    trade = Trade.query.get_or_404(trade_id)
+    trade = db.get_or_404(Trade, trade_id)
     if trade.user_id != current_user.id:
         flash("Unauthorized access", "danger")
         return redirect(url_for("main.index"))
+    from .forms import TradeForm
+
     form = TradeForm(obj=trade)
     if form.validate_on_submit():
         form.populate_obj(trade)
@@ -130,7 +265,7 @@ def edit_trade(trade_id: int):
 @login_required
 def delete_trade(trade_id: int):
     """Delete a trade."""
-    trade = Trade.query.get_or_404(trade_id)
+    trade = db.get_or_404(Trade, trade_id)
     if trade.user_id != current_user.id:
         flash("Unauthorized access", "danger")
         return redirect(url_for("main.index"))